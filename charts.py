@@ -1,5 +1,7 @@
 # charts.py - visualization utilities (Daily line, Monthly bars, Top-N categories)
 
+import copy
+
 import streamlit as st
 import pandas as pd
 import altair as alt
@@ -8,6 +10,38 @@ from typing import Optional, List
 # Allow large datasets
 alt.data_transformers.disable_max_rows()
 
+_SERIES_COLOR_SCALE = {'domain': ['Total_Spent', 'Total_Credit'], 'range': ['#d62728', '#2ca02c']}
+
+# Static charts are plain Vega-Lite templates handed to st.vega_lite_chart with the DataFrame,
+# skipping Altair's per-rerun schema validation; data travels as Arrow, not JSON records.
+_MONTHLY_BARS_SPEC = {
+    'mark': {'type': 'bar'},
+    'encoding': {
+        # 'YYYY-MM' labels sort chronologically as plain strings
+        'x': {'field': 'YearMonth', 'type': 'ordinal', 'sort': 'ascending', 'title': 'Month'},
+        'y': {'field': 'Amount', 'type': 'quantitative', 'title': 'Amount', 'axis': {'format': ',.0f'}},
+        'color': {'field': 'Type', 'type': 'nominal', 'title': 'Type', 'scale': _SERIES_COLOR_SCALE},
+        'tooltip': [
+            {'field': 'YearMonth', 'type': 'ordinal', 'title': 'Month'},
+            {'field': 'Type', 'type': 'nominal', 'title': 'Type'},
+            {'field': 'Amount', 'type': 'quantitative', 'title': 'Amount', 'format': ','},
+        ],
+    },
+    'params': [{'name': 'zoom', 'select': {'type': 'interval', 'encodings': ['x', 'y']}, 'bind': 'scales'}],
+}
+
+_TOP_CATEGORIES_SPEC = {
+    'mark': {'type': 'bar'},
+    'encoding': {
+        'x': {'field': 'Total', 'type': 'quantitative', 'title': 'Total spend', 'axis': {'format': ',.0f'}},
+        'y': {'field': 'Category', 'type': 'nominal', 'sort': '-x', 'title': 'Category'},
+        'tooltip': [
+            {'field': 'Category', 'type': 'nominal', 'title': 'Category'},
+            {'field': 'Total', 'type': 'quantitative', 'title': 'Total', 'format': ','},
+        ],
+    },
+}
+
 
 # ------------------ Utility functions ------------------ #
 def _ensure_date_col(df: pd.DataFrame, col: str = "Date") -> pd.DataFrame:
@@ -94,13 +128,14 @@ def _render_daily_line(plot_df: pd.DataFrame, converted_df: pd.DataFrame, series
         st.info("No series selected for plotting.")
         return
 
-    long = df.melt(id_vars='Date', value_vars=vars_to_plot, var_name='Type', value_name='Amount').sort_values('Date')
-    long['Amount'] = pd.to_numeric(long['Amount'], errors='coerce').fillna(0.0)
+    wide = df[['Date'] + vars_to_plot].copy()
+    wide[vars_to_plot] = wide[vars_to_plot].apply(pd.to_numeric, errors='coerce').fillna(0.0)
 
     date_sel = alt.selection_single(fields=['Date'], nearest=True, on='click', empty='none', clear='dblclick')
     color_scale = alt.Scale(domain=['Total_Spent', 'Total_Credit'], range=['#d62728', '#2ca02c'])
 
-    base = alt.Chart(long).mark_line(point=True).encode(
+    # wide -> long happens in the Vega-Lite spec (fold) rather than a pandas melt per rerun
+    base = alt.Chart(wide).transform_fold(vars_to_plot, as_=['Type', 'Amount']).mark_line(point=True).encode(
         x=alt.X('Date:T', title='Date'),
         y=alt.Y('Amount:Q', title='Amount', axis=alt.Axis(format=",.0f")),
         color=alt.Color('Type:N', title='Type', scale=color_scale),
@@ -185,32 +220,22 @@ def _render_monthly_bars(plot_df: pd.DataFrame, series_selected: List[str], heig
         st.info("No data for Monthly Bars chart.")
         return
 
-    df['YearMonth'] = df['Date'].dt.to_period('M').astype(str)
     vars_to_plot = [c for c in ['Total_Spent', 'Total_Credit'] if c in series_selected and c in df.columns]
 
     if not vars_to_plot:
         st.info("No valid series selected for Monthly Bars chart.")
         return
 
+    # aggregate in pandas so only one row per month and series is shipped to the browser
+    df['YearMonth'] = df['Date'].dt.to_period('M').astype(str)
     agg = df.groupby('YearMonth')[vars_to_plot].sum().reset_index()
     long = agg.melt(id_vars='YearMonth', value_vars=vars_to_plot, var_name='Type', value_name='Amount')
     long['Amount'] = pd.to_numeric(long['Amount'], errors='coerce').fillna(0.0)
-    yearmonth_order = sorted(long['YearMonth'].unique(), key=lambda x: pd.to_datetime(x + "-01"))
 
-    color_scale = alt.Scale(domain=['Total_Spent', 'Total_Credit'], range=['#d62728', '#2ca02c'])
+    spec = copy.deepcopy(_MONTHLY_BARS_SPEC)
+    spec['height'] = height
 
-    chart = alt.Chart(long).mark_bar().encode(
-        x=alt.X('YearMonth:N', sort=yearmonth_order, title='Month'),
-        y=alt.Y('Amount:Q', title='Amount', axis=alt.Axis(format=",.0f")),
-        color=alt.Color('Type:N', title='Type', scale=color_scale),
-        tooltip=[
-            alt.Tooltip('YearMonth:N', title='Month'),
-            alt.Tooltip('Type:N', title='Type'),
-            alt.Tooltip('Amount:Q', title='Amount', format=',')
-        ]
-    ).properties(height=height).interactive()
-
-    st.altair_chart(chart, use_container_width=True)
+    st.vega_lite_chart(long, spec, use_container_width=True)
 
 
 # ------------------ Top-N Categories Chart ------------------ #
@@ -253,13 +278,7 @@ def _render_top_categories(converted_df: pd.DataFrame, top_n: int, height: int):
     agg = agg.sort_values('Total', ascending=False).head(top_n)
     agg['Total'] = agg['Total'].astype(float)
 
-    chart = alt.Chart(agg).mark_bar().encode(
-        x=alt.X('Total:Q', title='Total spend', axis=alt.Axis(format=",.0f")),
-        y=alt.Y('Category:N', sort='-x', title='Category'),
-        tooltip=[
-            alt.Tooltip('Category:N', title='Category'),
-            alt.Tooltip('Total:Q', title='Total', format=',')
-        ]
-    ).properties(height=max(200, min(600, 40 * len(agg))))
+    spec = copy.deepcopy(_TOP_CATEGORIES_SPEC)
+    spec['height'] = max(200, min(600, 40 * len(agg)))
 
-    st.altair_chart(chart, use_container_width=True)
+    st.vega_lite_chart(agg[['Category', 'Total']], spec, use_container_width=True)
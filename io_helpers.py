@@ -2,6 +2,7 @@
 import json
 import os
 import re
+import threading
 from typing import Any, Dict, List, Tuple, Optional
 from datetime import datetime, timedelta
 
@@ -17,6 +18,14 @@ except Exception:
     build = None
     HttpError = Exception
 
+try:
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.http import HttpRequest, build_http
+except Exception:
+    AuthorizedHttp = None
+    HttpRequest = None
+    build_http = None
+
 
 def parse_service_account_secret(raw: Any) -> Dict:
     """Parse a service account JSON blob stored as dict or string. Returns a plain dict."""
@@ -34,6 +43,11 @@ def parse_service_account_secret(raw: Any) -> Dict:
             return json.loads(s.replace('\n', '\\n'))
 
 
+def _is_placeholder_header(cells: List[str]) -> bool:
+    """True when a header row is blank or only 'Unnamed'/'column'/'nan' placeholders."""
+    return all((h == "" or h.lower().startswith(("unnamed", "column", "nan"))) for h in cells)
+
+
 def _normalize_rows(values: List[List[str]]) -> Tuple[List[str], List[List]]:
     """
     Convert Google Sheets 'values' (list of rows) into header + normalized rows.
@@ -43,7 +57,7 @@ def _normalize_rows(values: List[List[str]]) -> Tuple[List[str], List[List]]:
         return [], []
     header_row = [str(x).strip() for x in values[0]]
     # if first row looks like "Unnamed" header or blank, synthesize
-    if all((h == "" or h.lower().startswith(("unnamed", "column", "nan"))) for h in header_row):
+    if _is_placeholder_header(header_row):
         max_cols = max(len(r) for r in values)
         header = [f"col_{i}" for i in range(max_cols)]
         data_rows = values
@@ -77,6 +91,52 @@ def values_to_dataframe(values: List[List[str]]) -> pd.DataFrame:
     return df
 
 
+def columns_to_dataframe(columns: List[List[str]]) -> pd.DataFrame:
+    """
+    Turn a column-major Google Sheets 'values' payload (majorDimension=COLUMNS) into a DataFrame.
+    Same result as values_to_dataframe on the row-major payload (header detection, short columns
+    padded with None, cells right of the last header dropped), but each column list is used as-is
+    instead of being rebuilt row by row.
+    """
+    if not columns:
+        return pd.DataFrame()
+    header_cells = [str(col[0]).strip() if col else "" for col in columns]
+    n_rows = max(len(col) for col in columns)
+    if _is_placeholder_header(header_cells):
+        header = [f"col_{i}" for i in range(len(columns))]
+        data_cols = columns
+    else:
+        # a row-major header stops at its last non-empty cell; wider data is trimmed to it
+        width = max(i for i, col in enumerate(columns) if col and col[0] not in ("", None)) + 1
+        header = header_cells[:width]
+        data_cols = [col[1:] for col in columns[:width]]
+        n_rows -= 1
+    padded = {i: col + [None] * (n_rows - len(col)) for i, col in enumerate(data_cols)}
+    df = pd.DataFrame(padded, columns=list(range(len(header))))
+    # positional build then rename keeps duplicate header names intact
+    df.columns = [str(c).strip() for c in header]
+    return df
+
+
+def align_frame_columns(frames: List[pd.DataFrame]) -> List[pd.DataFrame]:
+    """
+    Reindex every frame to one shared, ordered column index (first-seen order across frames;
+    columns missing from a frame are added empty). Concatenating the results is then a straight
+    per-column stack instead of a column union + reindex inside pd.concat.
+
+    Frames with duplicate column names (e.g. several blank header cells) can't be reindexed;
+    in that case all frames are returned unchanged and pd.concat handles them as before.
+    """
+    if any(not f.columns.is_unique for f in frames):
+        return list(frames)
+    columns: List[str] = []
+    for f in frames:
+        for c in f.columns:
+            if c not in columns:
+                columns.append(c)
+    return [f if list(f.columns) == columns else f.reindex(columns=columns) for f in frames]
+
+
 def _truthy_is_deleted(val: Any) -> bool:
     """Interpret a variety of string/number values as deleted True/False."""
     if val is None:
@@ -100,13 +160,38 @@ def _normalize_is_deleted_column(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def _build_shareable_service(creds):
+    """
+    Build a Sheets service that is safe to share between threads (e.g. via st.cache_resource).
+    httplib2.Http is not thread-safe, so each thread gets its own authorized Http, which it then
+    reuses (keep-alive) for every request it makes; credentials and discovery are built once.
+    Per-thread Http objects come from googleapiclient's build_http() so they keep its socket
+    timeout and redirect handling, same as build(credentials=...) would use.
+    """
+    if AuthorizedHttp is None or HttpRequest is None or build_http is None:
+        return build("sheets", "v4", credentials=creds, cache_discovery=False)
+
+    local = threading.local()
+
+    def _thread_http():
+        http = getattr(local, "http", None)
+        if http is None:
+            http = local.http = AuthorizedHttp(creds, http=build_http())
+        return http
+
+    def _request_builder(http, *args, **kwargs):
+        return HttpRequest(_thread_http(), *args, **kwargs)
+
+    return build("sheets", "v4", http=_thread_http(), requestBuilder=_request_builder, cache_discovery=False)
+
+
 def build_sheets_service_from_info(creds_info: Dict):
     """Create Google Sheets API service from service-account info dict (read-only scope)."""
     if service_account is None or build is None:
         raise RuntimeError("google-auth or google-api-client not installed.")
     scopes = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
     creds = service_account.Credentials.from_service_account_info(creds_info, scopes=scopes)
-    return build("sheets", "v4", credentials=creds, cache_discovery=False)
+    return _build_shareable_service(creds)
 
 
 def build_sheets_service_from_file(creds_file: str):
@@ -117,7 +202,7 @@ def build_sheets_service_from_file(creds_file: str):
         raise FileNotFoundError(f"Credentials file not found: {creds_file}")
     scopes = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
     creds = service_account.Credentials.from_service_account_file(creds_file, scopes=scopes)
-    return build("sheets", "v4", credentials=creds, cache_discovery=False)
+    return _build_shareable_service(creds)
 
 
 def build_sheets_service_write_from_info(creds_info: Dict):
@@ -140,6 +225,23 @@ def build_sheets_service_write_from_file(creds_file: str):
     return build("sheets", "v4", credentials=creds, cache_discovery=False)
 
 
+def build_service(creds_info: Optional[Dict] = None, creds_file: Optional[str] = None):
+    """
+    Return a read-only Google Sheets service.
+    Prefers creds_info (plain dict). If not provided, uses creds_file path.
+
+    The returned object holds the discovery document and credentials and is safe to use from
+    several threads, so callers may keep it around (e.g. in a resource cache) and pass it to
+    read_google_sheet(service=...).
+    """
+    if creds_info is None and (creds_file is None or not os.path.exists(creds_file)):
+        raise ValueError("No credentials found. Provide creds_info (plain dict) or a valid creds_file path.")
+    if creds_info is not None:
+        return build_sheets_service_from_info(creds_info)
+    else:
+        return build_sheets_service_from_file(creds_file)
+
+
 def _normalize_range_for_get(range_name: Optional[str]) -> Optional[str]:
     """Normalize a simple sheet/tab name to a wide A1 range so the Sheets API
     doesn't return a trimmed rect missing newly added rows/columns.
@@ -165,11 +267,13 @@ def _sheet_name_from_range(range_name: str) -> str:
 
 
 def read_google_sheet(spreadsheet_id: str, range_name: str,
-                      creds_info: Optional[Dict] = None, creds_file: Optional[str] = None) -> pd.DataFrame:
+                      creds_info: Optional[Dict] = None, creds_file: Optional[str] = None,
+                      service: Any = None) -> pd.DataFrame:
     """
     Read a Google Sheet and return a pandas DataFrame.
     - creds_info: parsed JSON dict for service account (plain dict) OR None
     - creds_file: path to service account JSON on disk OR None
+    - service: prebuilt Sheets service (see build_service); when given, credentials are not used
 
     IMPORTANT: Do NOT pass Streamlit runtime objects to this function.
     This function does NOT perform caching; callers may implement caching if desired.
@@ -177,14 +281,9 @@ def read_google_sheet(spreadsheet_id: str, range_name: str,
     The returned DataFrame will have normalized column names and, if an is_deleted column
     exists, it will be canonicalized to 'TRUE'/'FALSE' strings stored in the 'is_deleted' column.
     """
-    if creds_info is None and (creds_file is None or not os.path.exists(creds_file)):
-        raise ValueError("No credentials found. Provide creds_info (plain dict) or a valid creds_file path.")
-
-    # Build service
-    if creds_info is not None:
-        service = build_sheets_service_from_info(creds_info)
-    else:
-        service = build_sheets_service_from_file(creds_file)
+    # Build service unless the caller already holds one
+    if service is None:
+        service = build_service(creds_info, creds_file)
 
     # Candidate ranges to try (best-effort to catch manual appends that sometimes fall outside trimmed rect)
     tried_ranges = []
@@ -214,7 +313,7 @@ def read_google_sheet(spreadsheet_id: str, range_name: str,
         tried_ranges.append(r)
         try:
             sheet = service.spreadsheets()
-            res = sheet.values().get(spreadsheetId=spreadsheet_id, range=r).execute()
+            res = sheet.values().get(spreadsheetId=spreadsheet_id, range=r, majorDimension="COLUMNS").execute()
             values = res.get("values", []) or []
             # If we got values that look usable (non-empty or header present) accept it
             if values and len(values) > 0:
@@ -229,12 +328,45 @@ def read_google_sheet(spreadsheet_id: str, range_name: str,
         # If none worked and there was an HttpError, raise a helpful message
         raise RuntimeError(f"Google Sheets API error reading ranges {tried_ranges}: {last_err}")
 
-    # Convert into DataFrame
-    df = values_to_dataframe(values)
+    # Convert into DataFrame (values are column-major)
+    df = columns_to_dataframe(values)
     df = _normalize_is_deleted_column(df)
     return df
 
 
+def batch_read_google_sheets(spreadsheet_id: str, ranges: List[str],
+                             creds_info: Optional[Dict] = None, creds_file: Optional[str] = None,
+                             service: Any = None) -> List[pd.DataFrame]:
+    """
+    Read several ranges with a single spreadsheets.values.batchGet request.
+    Returns one DataFrame per entry in ranges (same order), parsed exactly like read_google_sheet.
+
+    A range that comes back empty is retried through read_google_sheet so its wider
+    fallback ranges (manual appends outside the trimmed rect) still apply.
+    """
+    if service is None:
+        service = build_service(creds_info, creds_file)
+
+    norm_ranges = [_normalize_range_for_get(r) for r in ranges]
+    try:
+        res = service.spreadsheets().values().batchGet(spreadsheetId=spreadsheet_id, ranges=norm_ranges,
+                                                       majorDimension="COLUMNS").execute()
+    except HttpError as e:
+        raise RuntimeError(f"Google Sheets API error batch-reading ranges {norm_ranges}: {e}")
+
+    value_ranges = res.get("valueRanges", []) or []
+    frames = []
+    for i, range_name in enumerate(ranges):
+        values = (value_ranges[i].get("values", []) or []) if i < len(value_ranges) else []
+        if not values:
+            frames.append(read_google_sheet(spreadsheet_id, range_name, service=service))
+            continue
+        df = columns_to_dataframe(values)
+        df = _normalize_is_deleted_column(df)
+        frames.append(df)
+    return frames
+
+
 # ---------------------------------------------------------------------
 # New write helpers (ensure headers sync between history + append, safe append)
 # ---------------------------------------------------------------------
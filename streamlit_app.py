@@ -1,10 +1,11 @@
 # streamlit_app.py — Complete Daily Spend Tracker (Google Sheets + Charts + Add Row + Remove Row)
 import streamlit as st
 import pandas as pd
+import numpy as np
 import importlib
 from datetime import datetime, date
 import traceback
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 
 st.set_page_config(page_title="💳 Daily Spend Tracker", layout="wide")
 st.title("💳 Daily Spending")
@@ -37,6 +38,7 @@ def main():
     SHEET_ID = _secrets.get("SHEET_ID")
     RANGE = _secrets.get("RANGE")
     APPEND_RANGE = _secrets.get("APPEND_RANGE")
+    DEBUG = bool(_secrets.get("DEBUG", False))
 
     if not SHEET_ID or not RANGE or not APPEND_RANGE:
         st.error("Missing Google Sheet secrets: SHEET_ID, RANGE, APPEND_RANGE.")
@@ -48,8 +50,6 @@ def main():
         return
 
     # ------------------ Session State ------------------
-    if "reload_key" not in st.session_state:
-        st.session_state.reload_key = 0
     if "last_refreshed" not in st.session_state:
         st.session_state.last_refreshed = None
     if "bank_options" not in st.session_state:
@@ -66,25 +66,62 @@ def main():
             return None
         return None
 
-    def _read_sheet_with_index(spreadsheet_id: str, range_name: str, source_name: str, creds_info: Optional[dict]):
+    @st.cache_resource(show_spinner=False)
+    def _get_sheets_service(creds_info_tuple: tuple):
+        # one authorized Sheets client per credential set, reused across reruns
+        return io_mod.build_service(dict(creds_info_tuple))
+
+    def _with_sheet_index(df: pd.DataFrame, source_name: str):
+        df = df.reset_index(drop=True)
+        # Sheets returns strings only; Arrow-backed strings hand off to st.dataframe without re-encoding
+        df = df.astype("string[pyarrow]")
+        if "is_deleted" in df.columns:
+            # io_helpers canonicalizes is_deleted to 'TRUE'/'FALSE'; store it as a real bool once
+            df["is_deleted"] = (df["is_deleted"] == "TRUE").fillna(False).astype(bool)
+        # int32 row ids on every frame (empty ones too) so the dtype survives the history/append concat
+        df["_sheet_row_idx"] = np.arange(len(df), dtype=np.int32)
+        df["_source_sheet"] = source_name
+        return df
+
+    def _sheet_result_with_index(future, range_name: str, source_name: str):
+        # resolved on the script thread so st.error output reaches the page
         try:
-            df = io_mod.read_google_sheet(spreadsheet_id, range_name, creds_info=creds_info)
+            df = future.result()
         except Exception as e:
             st.error(f"Failed to read sheet '{range_name}': {e}")
             st.text(traceback.format_exc())
             return pd.DataFrame()
-        df = df.reset_index(drop=True)
-        if not df.empty:
-            df["_sheet_row_idx"] = df.index.astype(int)
-        df["_source_sheet"] = source_name
-        return df
+        return _with_sheet_index(df, source_name)
 
     @st.cache_data(ttl=3, show_spinner=False)
-    def fetch_sheets(spreadsheet_id, range_hist, range_append, creds_info, reload_key):
-        hist_df = _read_sheet_with_index(spreadsheet_id, range_hist, "history", creds_info)
-        app_df = _read_sheet_with_index(spreadsheet_id, range_append, "append", creds_info)
+    def fetch_sheets(spreadsheet_id, range_hist, range_append, creds_info):
+        try:
+            service = _get_sheets_service(tuple(sorted(creds_info.items())))
+        except Exception as e:
+            st.error(f"Failed to create Google Sheets client: {e}")
+            st.text(traceback.format_exc())
+            return pd.DataFrame(), pd.DataFrame()
+        # one batchGet round-trip for both sheets; fall back to per-sheet reads if it fails
+        try:
+            hist_raw, app_raw = io_mod.batch_read_google_sheets(spreadsheet_id, [range_hist, range_append], service=service)
+        except Exception:
+            # per-sheet reads are independent; run them concurrently (socket waits release the GIL)
+            with ThreadPoolExecutor(max_workers=2) as ex:
+                f_hist = ex.submit(io_mod.read_google_sheet, spreadsheet_id, range_hist, service=service)
+                f_app = ex.submit(io_mod.read_google_sheet, spreadsheet_id, range_append, service=service)
+            hist_df = _sheet_result_with_index(f_hist, range_hist, "history")
+            app_df = _sheet_result_with_index(f_app, range_append, "append")
+        else:
+            hist_df = _with_sheet_index(hist_raw, "history")
+            app_df = _with_sheet_index(app_raw, "append")
+        # same column layout in both frames so the later pd.concat stacks columns without a union/reindex
+        hist_df, app_df = io_mod.align_frame_columns([hist_df, app_df])
         return hist_df, app_df
 
+    @st.cache_data(max_entries=4, show_spinner=False)
+    def _to_csv(df: pd.DataFrame) -> bytes:
+        return df.to_csv(index=False).encode("utf-8")
+
     # ------------------ Sidebar: Refresh + Controls ------------------
     st.sidebar.header("Controls")
     st.sidebar.markdown(
@@ -98,9 +135,9 @@ def main():
         """,
         unsafe_allow_html=True,
     )
-    if st.sidebar.button("🔁 Refresh Data", use_container_width=True, key="refresh_button"):
-        st.session_state.reload_key += 1
-        st.experimental_rerun()
+    # clearing only the fetch cache keeps the transform/daily-totals caches warm;
+    # the click itself triggers the rerun that refetches
+    st.sidebar.button("🔁 Refresh Data", use_container_width=True, key="refresh_button", on_click=fetch_sheets.clear)
 
     if st.session_state.last_refreshed:
         st.caption(f"Last refreshed: {st.session_state.last_refreshed.strftime('%Y-%m-%d %H:%M:%S UTC')}")
@@ -113,7 +150,7 @@ def main():
         return
 
     with st.spinner("Fetching Google Sheets..."):
-        history_df, append_df = fetch_sheets(SHEET_ID, RANGE, APPEND_RANGE, creds_info, st.session_state.reload_key)
+        history_df, append_df = fetch_sheets(SHEET_ID, RANGE, APPEND_RANGE, creds_info)
         st.session_state.last_refreshed = datetime.utcnow()
 
     if history_df.empty and append_df.empty:
@@ -124,8 +161,9 @@ def main():
 
     # ------------------ Filter Deleted ------------------
     if "is_deleted" in df_raw.columns:
-        mask = df_raw["is_deleted"].astype(str).str.lower().isin(["true", "t", "1", "yes"])
-        df_raw = df_raw.loc[~mask].copy()
+        # bool already; a sheet without the column leaves NaN after concat, hence the fillna
+        is_deleted = df_raw["is_deleted"].fillna(False).astype(bool)
+        df_raw = df_raw.loc[~is_deleted]
 
     if df_raw.empty:
         st.warning("No visible rows (after filtering deleted entries).")
@@ -133,7 +171,7 @@ def main():
 
     # ------------------ Transform ------------------
     try:
-        converted_df = transform.convert_columns_and_derives(df_raw.copy())
+        converted_df = transform.convert_columns_and_derives(df_raw)
     except Exception as e:
         st.error("Error while transforming sheet data (convert_columns_and_derives). See traceback below.")
         st.exception(e)
@@ -149,17 +187,26 @@ def main():
     except Exception:
         pass
 
-    if "timestamp" in converted_df.columns:
-        converted_df["timestamp"] = pd.to_datetime(converted_df["timestamp"], errors="coerce")
-    else:
-        converted_df["timestamp"] = pd.to_datetime(converted_df.get("date"), errors="coerce")
+    # transform returns timestamp as datetime64 (and derives date); only an empty result lacks them
+    if "timestamp" not in converted_df.columns:
+        converted_df["timestamp"] = pd.Series(pd.NaT, index=converted_df.index, dtype="datetime64[ns]")
+    if "date" not in converted_df.columns:
+        converted_df["date"] = converted_df["timestamp"].dt.date
+    if DEBUG:
+        # is_datetime64_dtype is False for tz-aware columns, unlike dtype.kind == "M"
+        assert pd.api.types.is_datetime64_dtype(converted_df["timestamp"]), converted_df["timestamp"].dtype
 
     if "Bank" not in converted_df.columns:
         converted_df["Bank"] = "Unknown"
 
+    # low-cardinality string columns -> categorical so isin/unique/grouping run on integer codes
+    converted_df["Bank"] = converted_df["Bank"].astype("category")
+    if "Type" in converted_df.columns:
+        converted_df["Type"] = converted_df["Type"].astype("category")
+
     # ------------------ Compute global daily totals ------------------
     try:
-        merged_all = transform.compute_daily_totals(converted_df.copy())
+        merged_all = transform.compute_daily_totals(converted_df)
         if not merged_all.empty:
             merged_all["Date"] = pd.to_datetime(merged_all["Date"]).dt.normalize()
     except Exception:
@@ -167,7 +214,7 @@ def main():
 
     # ------------------ Sidebar Filters ------------------
     st.sidebar.header("Filters")
-    banks = sorted([b for b in converted_df["Bank"].dropna().unique().tolist()])
+    banks = sorted([b for b in converted_df["Bank"].cat.categories.tolist()])
     if not banks:
         banks = ["Unknown"]
 
@@ -246,24 +293,10 @@ def main():
             start_sel, end_sel = dr, dr
 
     # ------------------ Compute totals for selected date/range ------------------
-    tmp = filtered_df.copy()
-    mask = tmp["timestamp"].dt.date.between(start_sel, end_sel)
-    sel_df = tmp.loc[mask]
-
-    amt_col = next((c for c in sel_df.columns if c.lower() == "amount"), None)
-    type_col = next((c for c in sel_df.columns if c.lower() == "type"), None)
-    credit_sum = debit_sum = credit_count = debit_count = 0
-
-    if amt_col:
-        sel_df["amt"] = pd.to_numeric(sel_df[amt_col], errors="coerce").fillna(0.0)
-        if type_col:
-            sel_df["type_norm"] = sel_df[type_col].astype(str).str.lower()
-            credit_mask = sel_df["type_norm"] == "credit"
-            debit_mask = sel_df["type_norm"] == "debit"
-            credit_sum = sel_df.loc[credit_mask, "amt"].sum()
-            debit_sum = sel_df.loc[debit_mask, "amt"].sum()
-            credit_count = int(credit_mask.sum())
-            debit_count = int(debit_mask.sum())
+    # one Timestamp-bounded mask on the datetime64 column, shared by the totals and the Rows table
+    date_mask = transform.date_range_mask(filtered_df, start_sel, end_sel)
+    credit_sum, debit_sum, credit_count, debit_count = transform.compute_totals(filtered_df, date_mask)
+    sel_view = filtered_df.loc[date_mask]
 
     # ------------------ Monthly average metric logic ------------------
     def _safe_mean(s):
@@ -390,14 +423,13 @@ def main():
 
     # ------------------ Rows Table ------------------
     st.subheader("Rows (matching selection)")
-    rows_df = filtered_df.copy()
-    mask = rows_df["timestamp"].dt.date.between(start_sel, end_sel)
-    rows_df = rows_df.loc[mask]
+    rows_df = sel_view
 
     display_cols = [c for c in ["timestamp", "Bank", "Type", "Amount", "Message"] if c in rows_df.columns]
     st.dataframe(rows_df[display_cols], use_container_width=True, height=420)
 
-    csv_data = rows_df.to_csv(index=False).encode("utf-8")
+    # memoized per distinct selection; only the displayed columns are stringified
+    csv_data = _to_csv(rows_df[display_cols])
     st.download_button("📥 Download CSV", csv_data, "transactions.csv", "text/csv")
 
     # ------------------ Remove Rows UI (soft delete) ------------------
@@ -415,7 +447,7 @@ def main():
                 ts = r.get("timestamp")
                 bank = r.get("Bank", "")
                 amt = r.get("Amount", "")
-                msg = r.get("Message", "") or r.get("message", "")
+                msg = next((m for m in (r.get("Message"), r.get("message")) if not pd.isna(m) and m != ""), "")
                 src = r.get("_source_sheet", "")
                 idx = r.get("_sheet_row_idx", "")
                 msg_short = (str(msg)[:40] + "...") if msg and len(str(msg)) > 40 else str(msg)
@@ -477,7 +509,7 @@ def main():
                             st.text(e)
                     else:
                         st.success(f"Marked {overall_updated} rows as deleted.")
-                        st.session_state.reload_key += 1
+                        fetch_sheets.clear()
                         st.experimental_rerun()
 
     # ------------------ Add New Row (always-show text input but disabled until checkbox checked) ------------------
@@ -560,7 +592,7 @@ def main():
                                 st.session_state["bank_options"].append(chosen_bank)
                                 st.session_state["bank_options"] = sorted(list(set(st.session_state["bank_options"])))
                             st.success("✅ Row added successfully with correct date & time!")
-                            st.session_state.reload_key += 1
+                            fetch_sheets.clear()
                             st.experimental_rerun()
                         else:
                             st.error(f"Failed to add row: {res}")
@@ -1,9 +1,28 @@
 # transform.py  -- pure data transformation utilities
 import re
-from typing import Optional
+from datetime import datetime
+from typing import Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+# Optional Polars engine for the groupby-heavy daily totals (falls back to pandas when missing)
+try:
+    import polars as pl
+except Exception:
+    pl = None
+
+# Optional JIT for the per-selection credit/debit reduction (numpy fallback when missing)
+try:
+    from numba import njit
+except Exception:
+    njit = None
+
+# Layouts timestamps reach us in: append_new_row's ISO-like text, the app's add-row DateTime/date
+# strings, and the en-US form Sheets renders USER_ENTERED datetimes as. The first non-blank value
+# picks one, so a matching column is parsed with an explicit format instead of inference.
+TIMESTAMP_FORMATS = ("%Y-%m-%d %H:%M:%S", "%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S")
+
 
 def _is_date_like_column(col_name: str) -> bool:
     lname = str(col_name).lower()
@@ -66,6 +85,43 @@ def _prefer_datetime_column(df: pd.DataFrame) -> Optional[str]:
     return None
 
 
+def _detect_timestamp_format(series: pd.Series) -> Optional[str]:
+    """Return the TIMESTAMP_FORMATS entry matching the first non-blank value, or None."""
+    for val in series:
+        if val is None or pd.isna(val):
+            continue
+        text = str(val).strip()
+        if not text:
+            continue
+        for fmt in TIMESTAMP_FORMATS:
+            try:
+                datetime.strptime(text, fmt)
+                return fmt
+            except ValueError:
+                continue
+        return None
+    return None
+
+
+def _parse_timestamp_series(series: pd.Series) -> pd.Series:
+    """
+    Parse a Series to datetime64. When the first non-blank value matches one of TIMESTAMP_FORMATS,
+    that format is used (fast, no per-element inference) and only entries that don't match fall
+    back to pandas' inference; otherwise the column goes straight to inference, parsed once.
+    Already-datetime input is returned unchanged.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    fmt = _detect_timestamp_format(series)
+    if fmt is None:
+        return pd.to_datetime(series, errors="coerce")
+    parsed = pd.to_datetime(series, format=fmt, errors="coerce", cache=True)
+    unparsed = parsed.isna() & series.notna()
+    if unparsed.any():
+        parsed.loc[unparsed] = pd.to_datetime(series.loc[unparsed], errors="coerce")
+    return parsed
+
+
 def _coerce_amount_series(series: pd.Series) -> pd.Series:
     """
     Convert a Series to numeric amounts:
@@ -87,7 +143,8 @@ def convert_columns_and_derives(df: pd.DataFrame) -> pd.DataFrame:
     """
     Normalize columns:
       - remove rows marked deleted via an 'is_deleted' column (case-insensitive)
-      - detect and coerce date/time columns -> timestamp (preferring DateTime if present)
+      - detect and coerce date/time columns -> timestamp (preferring DateTime if present);
+        timestamp is always naive datetime64 on return (tz-aware input is converted to UTC)
       - detect and coerce numeric columns -> Amount (float)
       - create 'date' column (date part of timestamp)
       - infer Type ('debit'/'credit') if missing based on sign of Amount
@@ -134,7 +191,7 @@ def convert_columns_and_derives(df: pd.DataFrame) -> pd.DataFrame:
     if primary_dt_col is None:
         for col in df.columns:
             try:
-                if df[col].dtype == object:
+                if pd.api.types.is_string_dtype(df[col].dtype):
                     parsed = pd.to_datetime(df[col], errors="coerce", dayfirst=False)
                     if parsed.notna().sum() >= 3:
                         primary_dt_col = col
@@ -158,7 +215,7 @@ def convert_columns_and_derives(df: pd.DataFrame) -> pd.DataFrame:
     if not amount_cols:
         for col in df.columns:
             try:
-                if df[col].dtype == object:
+                if pd.api.types.is_string_dtype(df[col].dtype):
                     sample = df[col].astype(str).head(30).str.replace(r"[^\d\.\-]", "", regex=True)
                     parsed = pd.to_numeric(sample.replace("", pd.NA), errors="coerce")
                     if parsed.notna().sum() >= 3:
@@ -197,19 +254,25 @@ def convert_columns_and_derives(df: pd.DataFrame) -> pd.DataFrame:
     # 5) Create canonical timestamp and date columns (prefer primary_dt_col)
     try:
         if primary_dt_col:
-            df["timestamp"] = pd.to_datetime(df[primary_dt_col], errors="coerce")
+            df["timestamp"] = _parse_timestamp_series(df[primary_dt_col])
         elif "timestamp" in df.columns:
-            df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+            df["timestamp"] = _parse_timestamp_series(df["timestamp"])
         elif "date" in df.columns:
-            df["timestamp"] = pd.to_datetime(df["date"], errors="coerce")
+            df["timestamp"] = _parse_timestamp_series(df["date"])
         else:
             df["timestamp"] = pd.NaT
     except Exception:
         df["timestamp"] = pd.NaT
-
-    # date (date part)
+    # callers rely on timestamp leaving here as naive datetime64 and never re-parse it;
+    # offset-aware input (e.g. "...T10:00:00+05:30") is shifted to naive UTC like mixed offsets are
+    if isinstance(df["timestamp"].dtype, pd.DatetimeTZDtype):
+        df["timestamp"] = df["timestamp"].dt.tz_convert(None)
+    elif not pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True).dt.tz_localize(None)
+
+    # date (date part) -- derived once here from the parsed timestamp
     try:
-        df["date"] = pd.to_datetime(df["timestamp"], errors="coerce").dt.date
+        df["date"] = df["timestamp"].dt.date
     except Exception:
         df["date"] = pd.NA
 
@@ -235,7 +298,7 @@ def convert_columns_and_derives(df: pd.DataFrame) -> pd.DataFrame:
     try:
         df["Type"] = df["Type"].astype(str).str.lower().str.strip()
         df["Type"] = df["Type"].replace(
-            {"nan": "unknown", "none": "unknown", "": "unknown", "na": "unknown", "null": "unknown"}
+            {"nan": "unknown", "none": "unknown", "": "unknown", "na": "unknown", "<na>": "unknown", "null": "unknown"}
         )
     except Exception:
         df["Type"] = "unknown"
@@ -261,6 +324,117 @@ def convert_columns_and_derives(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+def _agg_by_type_loop(amt, code):
+    cs = 0.0
+    ds = 0.0
+    cc = 0
+    dc = 0
+    for i in range(amt.size):
+        a = amt[i]
+        c = code[i]
+        if c == 1:
+            cs += a
+            cc += 1
+        elif c == 0:
+            ds += a
+            dc += 1
+    return cs, ds, cc, dc
+
+
+def _agg_by_type_numpy(amt, code):
+    is_credit = code == 1
+    is_debit = code == 0
+    return float(amt[is_credit].sum()), float(amt[is_debit].sum()), int(is_credit.sum()), int(is_debit.sum())
+
+
+def type_codes(type_values: np.ndarray) -> np.ndarray:
+    """Map lower-cased Type values to int8 codes: 1 = credit, 0 = debit, -1 = anything else."""
+    return np.where(type_values == "credit", 1, np.where(type_values == "debit", 0, -1)).astype(np.int8)
+
+
+# agg_by_type(amt: float64[:], code: int8[:]) -> (credit_sum, debit_sum, credit_count, debit_count)
+# Single pass over the selection; compiled with numba when installed.
+agg_by_type = njit(cache=True)(_agg_by_type_loop) if njit is not None else _agg_by_type_numpy
+
+
+def date_range_mask(df: pd.DataFrame, start, end) -> pd.Series:
+    """
+    Boolean mask of rows whose timestamp falls on a day in [start, end] (inclusive dates).
+    Compares against Timestamp bounds on the datetime64 column, so no per-row date objects.
+    """
+    start_ts = pd.Timestamp(start)
+    end_ts = pd.Timestamp(end) + pd.Timedelta(days=1)
+    return (df["timestamp"] >= start_ts) & (df["timestamp"] < end_ts)
+
+
+def compute_totals(df: pd.DataFrame, mask: pd.Series) -> Tuple[float, float, int, int]:
+    """
+    Credit/debit totals for the rows selected by mask (e.g. from date_range_mask).
+    Returns (credit_sum, debit_sum, credit_count, debit_count); zeros when Amount/Type are missing.
+    Expects Type lower-cased as produced by convert_columns_and_derives.
+    """
+    if df is None or df.empty:
+        return 0.0, 0.0, 0, 0
+    amt_col = next((c for c in df.columns if str(c).lower() == "amount"), None)
+    type_col = next((c for c in df.columns if str(c).lower() == "type"), None)
+    if amt_col is None or type_col is None:
+        return 0.0, 0.0, 0, 0
+
+    sel = np.asarray(mask, dtype=bool)
+    amt = pd.to_numeric(df[amt_col].to_numpy()[sel], errors="coerce")
+    amt = np.nan_to_num(np.asarray(amt, dtype="float64"), nan=0.0)
+    code = type_codes(df[type_col].to_numpy(dtype=object)[sel])
+    credit_sum, debit_sum, credit_count, debit_count = agg_by_type(amt, code)
+    return float(credit_sum), float(debit_sum), int(credit_count), int(debit_count)
+
+
+def _finalize_daily_totals(merged: pd.DataFrame) -> pd.DataFrame:
+    """Normalize dtypes/order of a Date, Total_Spent, Total_Credit frame."""
+    merged["Date"] = pd.to_datetime(merged["Date"]).dt.normalize()
+    merged["Total_Spent"] = merged.get("Total_Spent", 0).astype("float64")
+    merged["Total_Credit"] = merged.get("Total_Credit", 0).astype("float64")
+    merged = merged.sort_values("Date").reset_index(drop=True)
+    return merged
+
+
+def _has_nonblank_values(series: pd.Series) -> bool:
+    """Same answer as series.astype(str).str.strip().any(), checked over distinct values only."""
+    return any(str(v).strip() for v in series.unique())
+
+
+def _daily_totals_polars(w: pd.DataFrame, use_type: bool) -> pd.DataFrame:
+    """
+    Polars version of the per-day debit/credit sums in compute_daily_totals.
+    Expects w to carry _group_date and Amount_numeric; classifies rows by Type when use_type,
+    otherwise by sign of the amount. Days without any debit/credit rows are omitted, as in pandas.
+    """
+    columns = {"Date": w["_group_date"], "amount": w["Amount_numeric"]}
+    if use_type:
+        columns["Type"] = w["Type"]
+        kind = pl.col("Type").cast(pl.Utf8).str.to_lowercase().str.strip_chars()
+    else:
+        kind = pl.when(pl.col("amount") > 0).then(pl.lit("debit")).when(pl.col("amount") < 0).then(pl.lit("credit"))
+
+    # Type normalisation happens inside the lazy query rather than as pandas string ops
+    frame = pl.from_pandas(pd.DataFrame(columns))
+    daily = (
+        frame.lazy()
+        .with_columns(kind.alias("kind"))
+        .filter(pl.col("Date").is_not_null() & pl.col("kind").is_in(["debit", "credit"]))
+        .group_by("Date")
+        .agg([
+            pl.col("amount").filter(pl.col("kind") == "debit").sum().alias("Total_Spent"),
+            pl.col("amount").filter(pl.col("kind") == "credit").sum().alias("Total_Credit"),
+        ])
+        .collect()
+        .to_pandas()
+    )
+    # credits may be stored negative; report them as positive
+    if (daily["Total_Credit"] < 0).any():
+        daily["Total_Credit"] = daily["Total_Credit"].abs()
+    return _finalize_daily_totals(daily)
+
+
 def compute_daily_totals(df: pd.DataFrame) -> pd.DataFrame:
     """
     Compute daily totals DataFrame with columns:
@@ -302,10 +476,19 @@ def compute_daily_totals(df: pd.DataFrame) -> pd.DataFrame:
     w["Amount_numeric"] = pd.to_numeric(w.get("Amount", 0), errors="coerce").fillna(0.0).astype("float64")
 
     # If Type present and has meaningful values, use it
+    use_type = "Type" in w.columns and _has_nonblank_values(w["Type"])
+
+    if pl is not None:
+        try:
+            return _daily_totals_polars(w, use_type)
+        except Exception:
+            # fall back to the pandas implementation below
+            pass
+
     daily_spend = pd.DataFrame(columns=["Date", "Total_Spent"])
     daily_credit = pd.DataFrame(columns=["Date", "Total_Credit"])
 
-    if "Type" in w.columns and w["Type"].astype(str).str.strip().any():
+    if use_type:
         w["Type_norm"] = w["Type"].astype(str).str.lower().str.strip()
         debit_df = w[w["Type_norm"] == "debit"]
         credit_df = w[w["Type_norm"] == "credit"]
@@ -354,8 +537,4 @@ def compute_daily_totals(df: pd.DataFrame) -> pd.DataFrame:
 
     # Merge and normalize types
     merged = pd.merge(daily_spend, daily_credit, on="Date", how="outer").fillna(0)
-    merged["Date"] = pd.to_datetime(merged["Date"]).dt.normalize()
-    merged["Total_Spent"] = merged.get("Total_Spent", 0).astype("float64")
-    merged["Total_Credit"] = merged.get("Total_Credit", 0).astype("float64")
-    merged = merged.sort_values("Date").reset_index(drop=True)
-    return merged
+    return _finalize_daily_totals(merged)